@@ -1,91 +1,239 @@
 import logging
-import os
+import orjson
 import requests
-from requests_hawk import HawkAuth
-from cache_memoize import cache_memoize
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
+from functools import lru_cache
 from django.conf import settings
+from django.core.cache import cache
 from django.forms.models import model_to_dict
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib3.util.retry import Retry
 
 import app.enquiries.ref_data as ref_data
 from app.enquiries.utils import get_oauth_payload
 from app.enquiries.common.cache import cached_requests
 
+# Metadata categories required to prepare an investment payload
+DATA_HUB_METADATA_ENDPOINTS = (
+    "investment-type",
+    "fdi-type",
+    "investment-project-stage",
+    "investment-investor-type",
+    "investment-involvement",
+    "investment-specific-programme",
+    "sector",
+    "referral-source-activity",
+    "referral-source-website",
+)
+METADATA_CACHE_TIMEOUT = 60 * 60
+ADVISER_CACHE_TIMEOUT = 5 * 60
+
+# Investment payload fields resolved from an enquiry's choice field display value
+# as (payload key, enquiry display method, metadata endpoint)
+_INVESTMENT_FIELD_MAP = (
+    ("fdi_type", "get_investment_type_display", "fdi-type"),
+    ("investor_type", "get_new_existing_investor_display", "investment-investor-type"),
+    ("level_of_involvement", "get_investor_involvement_level_display", "investment-involvement"),
+    (
+        "specific_programme",
+        "get_specific_investment_programme_display",
+        "investment-specific-programme",
+    ),
+)
+# Investment payload fields which always take the same metadata value
+# as (payload key, metadata endpoint, metadata name)
+_INVESTMENT_FIXED_FIELD_MAP = (
+    ("investment_type", "investment-type", ref_data.DATA_HUB_INVESTMENT_TYPE_FDI),
+    ("stage", "investment-project-stage", ref_data.DATA_HUB_PROJECT_STAGE_PROSPECT),
+)
+_REFERRAL_FIXED_FIELD_MAP = (
+    (
+        "referral_source_activity",
+        "referral-source-activity",
+        ref_data.DATA_HUB_REFERRAL_SOURCE_ACTIVITY_WEBSITE,
+    ),
+    (
+        "referral_source_activity_website",
+        "referral-source-website",
+        ref_data.DATA_HUB_REFERRAL_SOURCE_WEBSITE,
+    ),
+)
+
+# Shared session so that Data Hub requests reuse pooled keep-alive connections
+_DH_SESSION = requests.Session()
+_DH_ADAPTER = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    # Only retry connection setup and gateway errors, a read timeout means Data Hub
+    # accepted the request and retrying would multiply the time spent waiting
+    max_retries=Retry(
+        total=2,
+        connect=2,
+        read=False,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    ),
+)
+_DH_SESSION.mount("https://", _DH_ADAPTER)
+_DH_SESSION.mount("http://", _DH_ADAPTER)
+
+# Data Hub requests are refused for DH_CIRCUIT_RESET_TIMEOUT seconds once
+# DH_CIRCUIT_FAILURE_THRESHOLD requests have failed in a row, with no more
+# than DH_CIRCUIT_RESET_TIMEOUT seconds between failures
+DH_CIRCUIT_FAILURE_THRESHOLD = 5
+DH_CIRCUIT_RESET_TIMEOUT = 30
+DH_CIRCUIT_CACHE_KEY = "dh_fail_count"
+DH_CIRCUIT_OPEN_CACHE_KEY = "dh_circuit_open"
+
+
+class DataHubCircuitOpenError(RequestException):
+    """Raised instead of requesting |data-hub-api|_ while it keeps failing."""
+
+
+def _record_dh_failure():
+    cache.add(DH_CIRCUIT_CACHE_KEY, 0, timeout=DH_CIRCUIT_RESET_TIMEOUT)
+    try:
+        failures = cache.incr(DH_CIRCUIT_CACHE_KEY)
+    except ValueError:
+        # The counter expired in the meantime
+        return
+
+    if failures >= DH_CIRCUIT_FAILURE_THRESHOLD:
+        cache.set(DH_CIRCUIT_OPEN_CACHE_KEY, True, timeout=DH_CIRCUIT_RESET_TIMEOUT)
+        cache.delete(DH_CIRCUIT_CACHE_KEY)
+    else:
+        # Extend the count from the latest failure so that slow failures,
+        # e.g. timeouts, still add up to the threshold
+        cache.touch(DH_CIRCUIT_CACHE_KEY, timeout=DH_CIRCUIT_RESET_TIMEOUT)
 
-def dh_request(
-    request,
-    access_token,
-    method,
-    url,
-    payload=None,
-    request_headers=None,
-    params=None,
-    timeout=15,
-):
+
+def _dh_headers(request, access_token):
+    # Extract access token
+    if not access_token:
+        session = get_oauth_payload(request)
+        access_token = session["access_token"]
+
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {access_token}",
+    }
+
+
+def _dh_send(send, url, timeout, **kwargs):
+    circuit = cache.get_many((DH_CIRCUIT_OPEN_CACHE_KEY, DH_CIRCUIT_CACHE_KEY))
+    if circuit.get(DH_CIRCUIT_OPEN_CACHE_KEY):
+        logging.error(f"Not requesting {url}, recent Data Hub requests keep failing")
+        raise DataHubCircuitOpenError(f"Data Hub is unavailable, not requesting {url}")
+
+    try:
+        response = send(url, timeout=timeout, **kwargs)
+    except RequestException as e:
+        _record_dh_failure()
+        logging.error(f"Error {e} while requesting {url}, request timeout set to {timeout} secs")
+        raise e
+
+    if response.status_code >= 500:
+        _record_dh_failure()
+    elif DH_CIRCUIT_CACHE_KEY in circuit:
+        cache.delete(DH_CIRCUIT_CACHE_KEY)
+
+    return response
+
+
+def dh_get(request, access_token, url, params=None, timeout=15):
     """
-    Makes a |data-hub-api|_ request.
+    Makes a |data-hub-api|_ ``GET`` request.
 
     :param request: A Django request
     :type request: django.http.HttpRequest
 
-    :param access_token: A valid |oauth| `access_token`
+    :param access_token:
+        A valid |oauth| `access_token`, taken from the ``request`` session if empty
     :type access_token: str
 
-    :param method: HTTP method
-    :type method: str
-
     :param url: A full |data-hub-api|_ URL
     :type url: str
 
-    :param payload: The request payload
-    :type payload: A JSON serializable value, optional
+    :param params: Querystring params
+    :type params: dict, optional
+
+    :param timeout: A timeout after which the function throws an error
+    :type timeout: int, optional
 
-    :param request_headers: Request headers
-    :type request_headers: dict, optional
+    :returns: A :class:`requests.Response` instance
 
-    :param params: GET request querystring params
-    :type params: dict, optional
+    :raises DataHubCircuitOpenError:
+        If too many |data-hub-api|_ requests have failed recently
+    """
+    return _dh_send(
+        _DH_SESSION.get,
+        url,
+        timeout,
+        headers=_dh_headers(request, access_token),
+        params=params,
+    )
+
+
+def dh_post(request, access_token, url, payload, timeout=15):
+    """
+    Makes a |data-hub-api|_ ``POST`` request.
+
+    :param request: A Django request
+    :type request: django.http.HttpRequest
+
+    :param access_token:
+        A valid |oauth| `access_token`, taken from the ``request`` session if empty
+    :type access_token: str
+
+    :param url: A full |data-hub-api|_ URL
+    :type url: str
+
+    :param payload: The request payload
+    :type payload: A JSON serializable value
 
     :param timeout: A timeout after which the function throws an error
     :type timeout: int, optional
 
     :returns: A :class:`requests.Response` instance
+
+    :raises DataHubCircuitOpenError:
+        If too many |data-hub-api|_ requests have failed recently
     """
+    return _dh_send(
+        _DH_SESSION.post,
+        url,
+        timeout,
+        headers=_dh_headers(request, access_token),
+        json=payload,
+    )
 
-    if request_headers:
-        headers = request_headers
-    else:
-        # Extract access token
-        if not access_token:
-            session = get_oauth_payload(request)
-            access_token = session["access_token"]
-
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}",
-        }
 
-    params = params if params else {}
+@lru_cache(maxsize=None)
+def get_metadata_auth():
+    """
+    Returns the :class:`requests_hawk.HawkAuth` used to sign metadata requests.
 
-    try:
-        if method == "GET":
-            response = requests.get(url, headers=headers, params=params, timeout=timeout)
-        elif method == "POST":
-            response = requests.post(url, headers=headers, json=payload, timeout=timeout)
-    except RequestException as e:
-        logging.error(f"Error {e} while requesting {url}, request timeout set to {timeout} secs")
-        raise e
+    The instance only holds the credentials and is built once per process,
+    a new Hawk ``Sender`` is still created for every request it signs.
+    """
+    # Only needed for metadata requests, so imported on first use
+    from requests_hawk import HawkAuth
 
-    return response
+    return HawkAuth(
+        id=settings.DATA_HUB_HAWK_ID,
+        key=settings.DATA_HUB_HAWK_KEY,
+    )
 
 
-@cache_memoize(60 * 60)
 def fetch_metadata(name):
     """
-    Fetches |data-hub-api|_ metadata by ``name``. The function is *memoized* for
-    one hour in :doc:`Django's cache <topics/cache>`.
+    Fetches |data-hub-api|_ metadata by ``name``. Use :func:`fetch_all_metadata`
+    to benefit from caching.
 
     :param name:
         The trailing part of the |data-hub-api|_ metadata endpoint e.g.
@@ -94,20 +242,102 @@ def fetch_metadata(name):
 
     :returns: The parsed metadata as a ``list`` of dictionaries.
     """
-    url = os.path.join(settings.DATA_HUB_METADATA_URL, name)
+    url = f"{settings.DATA_HUB_METADATA_URL.rstrip('/')}/{name}"
     response = cached_requests.get(
         url,
-        auth=HawkAuth(
-            id=settings.DATA_HUB_HAWK_ID,
-            key=settings.DATA_HUB_HAWK_KEY,
-        ),
+        auth=get_metadata_auth(),
         # Add dummy data to avoid error: MissingContent payload content and/or content_type cannot
         # be empty when always_hash_content is True
         data={"data": name},
         timeout=10,
     )
     response.raise_for_status()
-    return response.json()
+    return orjson.loads(response.content)
+
+
+def metadata_cache_key(name):
+    """
+    Returns the :doc:`Django's cache <topics/cache>` key of the metadata index
+    for the endpoint ``name``.
+    """
+    return f"dh_meta:{name}"
+
+
+def fetch_all_metadata(names=DATA_HUB_METADATA_ENDPOINTS):
+    """
+    Fetches several |data-hub-api|_ metadata endpoints concurrently.
+
+    The metadata indexes are read from and written to
+    :doc:`Django's cache <topics/cache>` in a single batch each, so that only
+    the endpoints missing from the cache are requested. Each of those is
+    fetched with :func:`fetch_metadata` in its own thread so the total time is
+    bound by the slowest endpoint rather than the sum of all.
+    Results are collected as they arrive and failures are logged straight away.
+    The endpoints fetched successfully are cached even if another one failed,
+    in which case the first error is raised afterwards.
+
+    :param names: The metadata endpoint names to fetch
+    :type names: tuple, optional
+
+    :returns:
+        A ``dict`` of metadata indexes (see :func:`index_metadata`) keyed by
+        endpoint name
+    """
+    cache_keys = {metadata_cache_key(name): name for name in names}
+    metadata = {cache_keys[key]: value for key, value in cache.get_many(cache_keys).items()}
+
+    missing = [name for name in names if name not in metadata]
+    if not missing:
+        return metadata
+
+    fetched = {}
+    error = None
+    with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+        futures = {executor.submit(fetch_metadata, name): name for name in missing}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                fetched[name] = index_metadata(future.result())
+            except (RequestException, ValueError) as e:
+                logging.error(f"Error {e} while fetching Data Hub metadata {name}")
+                error = error or e
+
+    if fetched:
+        cache.set_many(
+            {metadata_cache_key(name): index for name, index in fetched.items()},
+            timeout=METADATA_CACHE_TIMEOUT,
+        )
+    if error:
+        raise error
+
+    metadata.update(fetched)
+
+    return metadata
+
+
+def invalidate_metadata_cache(names=DATA_HUB_METADATA_ENDPOINTS):
+    """
+    Removes the cached metadata indexes of the given endpoints from
+    :doc:`Django's cache <topics/cache>` in a single batch, so that they are
+    fetched again by the next :func:`fetch_all_metadata` call.
+
+    :param names: The metadata endpoint names to invalidate
+    :type names: tuple, optional
+    """
+    cache.delete_many([metadata_cache_key(name) for name in names])
+
+
+def index_metadata(metadata):
+    """
+    Builds a lookup of |data-hub|_ metadata IDs by their lowercased name.
+
+    :param metadata: |data-hub|_ metadata list
+    :type metadata: TypedDict('Metadata', {'name': str, 'id': str})
+
+    :returns: A ``dict`` mapping lowercased names to |data-hub|_ uuids
+    """
+    # Iterate in reverse so that the first item wins if a name is duplicated
+    return {item["name"].lower(): item["id"] for item in reversed(metadata)}
 
 
 def resolve_metadata_id(title, metadata):
@@ -116,19 +346,12 @@ def resolve_metadata_id(title, metadata):
 
     :param title: Metadata title
     :type title: str
-    :param metadata: |data-hub|_ metadata list
-    :type metadata: TypedDict('Metadata', {'name': str, 'id': str})
+    :param metadata: |data-hub|_ metadata index as returned by :func:`index_metadata`
+    :type metadata: dict
 
     :returns: |data-hub|_ uuid for the given ``title`` if found, else ``None``
     """
-
-    filtered = list(filter(
-        lambda d: d['name'].lower() == title.lower(),
-        metadata,
-    ))
-
-    if filtered:
-        return filtered[0]['id']
+    return metadata.get(title.lower())
 
 
 def dh_get_user_details(request, access_token):
@@ -144,14 +367,15 @@ def dh_get_user_details(request, access_token):
 
     url = settings.DATA_HUB_WHOAMI_URL
 
-    response = dh_request(request, access_token, "GET", url, {})
+    response = dh_get(request, access_token, url)
+    body = orjson.loads(response.content)
     if not response.ok:
-        return None, response.json()
+        return None, body
 
-    return response.json(), None
+    return body, None
 
 
-def dh_company_search(request, access_token, company_name):
+def dh_company_search(request, access_token, company_name, limit=None):
     """
     Performs a Company name search using |data-hub-api|_.
 
@@ -164,22 +388,31 @@ def dh_company_search(request, access_token, company_name):
     :param company_name: Company name to search for
     :type company_name: str
 
+    :param limit:
+        Maximum number of companies |data-hub-api|_ should return, defaults to
+        ``settings.DATA_HUB_COMPANY_SEARCH_LIMIT``
+    :type limit: int, optional
+
     :returns: A subset of fields for each company found
     :rtype: list
     """
     companies = []
     url = settings.DATA_HUB_COMPANY_SEARCH_URL
-    payload = {"name": company_name}
+    payload = {
+        "name": company_name,
+        "limit": limit or settings.DATA_HUB_COMPANY_SEARCH_LIMIT,
+    }
 
-    response = dh_request(request, access_token, "POST", url, payload)
+    response = dh_post(request, access_token, url, payload)
+    body = orjson.loads(response.content)
 
     # It is not an error for us if the request fails, this can happen if the
     # Access token is invalid, consider that there are no matches however
     # user is notified of the error to take appropriate action
     if not response.ok:
-        return companies, response.json()
+        return companies, body
 
-    for company in response.json()["results"]:
+    for company in body["results"]:
         address = company["address"]
         companies.append(
             {
@@ -221,10 +454,11 @@ def dh_get_company_contact_list(request, access_token, company_id):
     url = settings.DATA_HUB_CONTACT_SEARCH_URL
     payload = {"company": [company_id]}
 
-    response = dh_request(request, access_token, "POST", url, payload)
+    response = dh_post(request, access_token, url, payload)
+    body = orjson.loads(response.content)
 
     if not response.ok:
-        return contacts, response.json()
+        return contacts, body
 
     contacts = [
         {
@@ -235,7 +469,7 @@ def dh_get_company_contact_list(request, access_token, company_id):
             "email": contact["email"],
             "phone": contact.get("full_telephone_number") or contact.get("telephone_number"),
         }
-        for contact in response.json()["results"]
+        for contact in body["results"]
     ]
 
     return contacts, None
@@ -330,11 +564,12 @@ def dh_contact_create(request, access_token, enquirer, company_id, primary=False
         "address_same_as_company": True,
     }
 
-    response = dh_request(request, access_token, "POST", url, payload)
+    response = dh_post(request, access_token, url, payload)
+    body = orjson.loads(response.content)
     if not response.ok:
-        return None, response.json()
+        return None, body
 
-    return response.json(), None
+    return body, None
 
 
 def dh_prepare_contact(request, access_token, enquirer, company_id):
@@ -412,7 +647,8 @@ def dh_prepare_contact(request, access_token, enquirer, company_id):
 
 def dh_adviser_search(request, access_token, adviser_name):
     """
-    Performs an `adviser` |data-hub-api|_ search.
+    Performs an `adviser` |data-hub-api|_ search. Non-empty results are cached
+    by ``adviser_name`` for five minutes in :doc:`Django's cache <topics/cache>`.
 
     :param request:
     :type request: django.http.HttpRequest
@@ -426,13 +662,19 @@ def dh_adviser_search(request, access_token, adviser_name):
     :returns: A subset of fields for each Adviser found
     :rtype: list
     """
+    cache_key = f"dh_adviser:{quote(adviser_name.lower())}"
+    advisers = cache.get(cache_key)
+    if advisers:
+        return advisers, None
+
     advisers = []
     url = settings.DATA_HUB_ADVISER_SEARCH_URL
     params = {"autocomplete": adviser_name}
 
-    response = dh_request(request, access_token, "GET", url, {}, params=params)
+    response = dh_get(request, access_token, url, params=params)
+    body = orjson.loads(response.content)
     if not response.ok:
-        return advisers, response.json()
+        return advisers, body
 
     advisers = [
         {
@@ -440,16 +682,16 @@ def dh_adviser_search(request, access_token, adviser_name):
             "name": adviser["first_name"],
             "is_active": adviser["is_active"],
         }
-        for adviser in response.json()["results"]
+        for adviser in body["results"]
     ]
+    if advisers:
+        cache.set(cache_key, advisers, timeout=ADVISER_CACHE_TIMEOUT)
 
     return advisers, None
 
 
-def get_dh_id(metadata_items, name):
-    item = list(filter(lambda x: x["name"] == name, metadata_items))
-    assert len(item) == 1
-    return item[0]["id"]
+def get_dh_id(metadata, name):
+    return metadata[name.lower()]
 
 
 def dh_enquiry_readiness(request, access_token, enquiry):
@@ -471,14 +713,22 @@ def dh_enquiry_readiness(request, access_token, enquiry):
     :returns: JSON-parsed |data-hub-api|_ response
     :rtype: dict
     """
-    response = {"errors": []}
+    response = {"errors": _enquiry_readiness_errors(enquiry)}
+    if response["errors"]:
+        return response
+
+    advisers, error = dh_adviser_search(request, access_token, enquiry.client_relationship_manager)
+    return _adviser_readiness(enquiry, advisers, error)
+
+
+def _enquiry_readiness_errors(enquiry):
+    # The readiness checks which only need the enquiry itself
+    errors = []
 
     # Allow creating of investments only if Company exists on DH
     if not enquiry.dh_company_id:
-        response["errors"].append(
-            dict(company=f"{enquiry.company_name} doesn't exist in Data Hub")
-        )
-        return response
+        errors.append(dict(company=f"{enquiry.company_name} doesn't exist in Data Hub"))
+        return errors
 
     # Same enquiry cannot be submitted if it is already done once
     if enquiry.date_added_to_datahub or (
@@ -492,16 +742,15 @@ def dh_enquiry_readiness(request, access_token, enquiry):
             else "----"
         )
         stage = enquiry.get_datahub_project_status_display()
-        response["errors"].append(
+        errors.append(
             {
                 "enquiry": f"Enquiry can only be submitted once,"
                 f" previously submitted on {prev_submission_date}, stage {stage}"
             }
         )
-        return response
+        return errors
 
     enquiry_dict = model_to_dict(enquiry)
-    empty_values = False
     for field in [
         "client_relationship_manager",
         "project_name",
@@ -510,19 +759,21 @@ def dh_enquiry_readiness(request, access_token, enquiry):
         "estimated_land_date",
     ]:
         if not enquiry_dict[field]:
-            response["errors"].append({field: "This value is required, should not be empty"})
-            empty_values = True
+            errors.append({field: "This value is required, should not be empty"})
 
-    if empty_values:
-        return response
+    if errors:
+        return errors
 
     if enquiry.investment_type == "DEFAULT":
-        response["errors"].append(
-            {"investment_type": "Please select investment type, it cannot be empty"}
-        )
-        return response
+        errors.append({"investment_type": "Please select investment type, it cannot be empty"})
+
+    return errors
+
+
+def _adviser_readiness(enquiry, advisers, error):
+    # The readiness checks on the result of the client relationship manager search
+    response = {"errors": []}
 
-    advisers, error = dh_adviser_search(request, access_token, enquiry.client_relationship_manager)
     if error:
         response["errors"].append({"adviser_search": error})
         return response
@@ -565,9 +816,11 @@ def dh_prepare_payload(
         ``payload`` is a ``dict``.
     """
 
+    metadata = fetch_all_metadata()
+
     sector = resolve_metadata_id(
         enquiry.get_primary_sector_display(),
-        fetch_metadata("sector"),
+        metadata["sector"],
     )
 
     payload = dict(
@@ -575,30 +828,6 @@ def dh_prepare_payload(
         investor_company=company_id,
         description=enquiry.project_description,
         anonymous_description=enquiry.anonymised_project_description,
-        investment_type=get_dh_id(
-            fetch_metadata("investment-type"),
-            ref_data.DATA_HUB_INVESTMENT_TYPE_FDI
-        ),
-        fdi_type=resolve_metadata_id(
-            enquiry.get_investment_type_display(),
-            fetch_metadata("fdi-type"),
-        ),
-        stage=get_dh_id(
-            fetch_metadata("investment-project-stage"),
-            ref_data.DATA_HUB_PROJECT_STAGE_PROSPECT,
-        ),
-        investor_type=resolve_metadata_id(
-            enquiry.get_new_existing_investor_display(),
-            fetch_metadata("investment-investor-type"),
-        ),
-        level_of_involvement=resolve_metadata_id(
-            enquiry.get_investor_involvement_level_display(),
-            fetch_metadata("investment-involvement"),
-        ),
-        specific_programme=resolve_metadata_id(
-            enquiry.get_specific_investment_programme_display(),
-            fetch_metadata("investment-specific-programme"),
-        ),
         client_contacts=[contact_id],
         client_relationship_manager=client_relationship_manager_id,
         sector=sector,
@@ -606,6 +835,12 @@ def dh_prepare_payload(
             enquiry.estimated_land_date and enquiry.estimated_land_date.isoformat()
         ),
     )
+    for payload_key, category, name in _INVESTMENT_FIXED_FIELD_MAP:
+        payload[payload_key] = get_dh_id(metadata[category], name)
+    for payload_key, display_attr, category in _INVESTMENT_FIELD_MAP:
+        payload[payload_key] = resolve_metadata_id(
+            getattr(enquiry, display_attr)(), metadata[category],
+        )
 
     # There is a mismatch in the sector data coming from the website vs
     # the metadata in DH, hence bail out if we don't get uuid because of
@@ -616,15 +851,9 @@ def dh_prepare_payload(
     payload.update(
         business_activities=[ref_data.DATA_HUB_BUSINESS_ACTIVITIES_SERVICES],
         referral_source_adviser=adviser_id,
-        referral_source_activity=get_dh_id(
-            fetch_metadata("referral-source-activity"),
-            ref_data.DATA_HUB_REFERRAL_SOURCE_ACTIVITY_WEBSITE,
-        ),
-        referral_source_activity_website=get_dh_id(
-            fetch_metadata("referral-source-website"),
-            ref_data.DATA_HUB_REFERRAL_SOURCE_WEBSITE
-        ),
     )
+    for payload_key, category, name in _REFERRAL_FIXED_FIELD_MAP:
+        payload[payload_key] = get_dh_id(metadata[category], name)
 
     return payload, None
 
@@ -656,15 +885,29 @@ def dh_investment_create(request, enquiry):
     session = get_oauth_payload(request)
     access_token = session["access_token"]
 
+    response["errors"] = _enquiry_readiness_errors(enquiry)
+    if response["errors"]:
+        return response
+
+    # The user lookup and the adviser search are independent read-only requests
+    # so they are made concurrently. Neither may access the database, the
+    # worker thread's connection would never be closed.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        user_details_future = executor.submit(dh_get_user_details, request, access_token)
+        adviser_future = executor.submit(
+            dh_adviser_search, request, access_token, enquiry.client_relationship_manager,
+        )
+        user_details, error = user_details_future.result()
+        advisers, adviser_error = adviser_future.result()
+
     # check if the user is available in DataHub
-    user_details, error = dh_get_user_details(request, access_token)
     if error:
         response["errors"].append(
             {"referral_advisor": "Error validating your identity in DataHub"}
         )
         return response
 
-    dh_status = dh_enquiry_readiness(request, access_token, enquiry)
+    dh_status = _adviser_readiness(enquiry, advisers, adviser_error)
     if dh_status["errors"]:
         response["errors"].extend(dh_status["errors"])
         return response
@@ -691,11 +934,11 @@ def dh_investment_create(request, enquiry):
         return response
 
     try:
-        result = dh_request(request, access_token, "POST", url, payload)
+        result = dh_post(request, access_token, url, payload)
 
         result.raise_for_status()
 
-        response["result"] = result.json()
+        response["result"] = orjson.loads(result.content)
     except HTTPError as e:
         response["errors"].append(
             {"investment_create": f"Error contacting DataHub_ to create investment, {str(e)}"}
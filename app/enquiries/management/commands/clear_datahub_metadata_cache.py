@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from app.enquiries.common.datahub_utils import (
+    DATA_HUB_METADATA_ENDPOINTS,
+    invalidate_metadata_cache,
+)
+
+
+class Command(BaseCommand):
+    """
+    Clears the cached Data Hub metadata e.g. after reference data has changed.
+    """
+
+    help = "Clears the cached Data Hub metadata, all endpoints unless any are given"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "endpoints",
+            nargs="*",
+            help=f"Metadata endpoints to clear, any of: {', '.join(DATA_HUB_METADATA_ENDPOINTS)}",
+        )
+
+    def handle(self, *args, **options):
+        endpoints = options["endpoints"] or DATA_HUB_METADATA_ENDPOINTS
+        unknown = set(endpoints) - set(DATA_HUB_METADATA_ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown metadata endpoints: {', '.join(sorted(unknown))}")
+
+        invalidate_metadata_cache(endpoints)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Cleared cached Data Hub metadata: {', '.join(endpoints)}")
+        )
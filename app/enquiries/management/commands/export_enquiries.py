@@ -18,7 +18,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         count = 0
         timestamp = datetime.now().strftime("%Y-%m-%dT%H%M%S")
-        entries = Enquiry.objects.all().iterator()
+        entries = Enquiry.objects.select_related("enquirer").iterator(chunk_size=500)
         filename = f"{OUTPUT_FILE_SLUG}_{timestamp}{OUTPUT_FILE_EXT}"
         with open(filename, "w", newline="") as f:
             writer = csv.writer(f)
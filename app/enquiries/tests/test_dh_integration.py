@@ -1,19 +1,30 @@
+import socket
+import orjson
 import pytest
 import requests_mock
 
 from datetime import date
 from django.conf import settings
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.test.client import RequestFactory
-from requests.exceptions import Timeout
+from freezegun import freeze_time
+from requests.exceptions import ReadTimeout, Timeout
 from unittest import mock
 from uuid import uuid4
 
 from app.enquiries.tests.factories import EnquiryFactory
 from app.enquiries.common.datahub_utils import (
-    dh_request,
+    DH_CIRCUIT_FAILURE_THRESHOLD,
+    DH_CIRCUIT_RESET_TIMEOUT,
+    DataHubCircuitOpenError,
+    dh_get,
+    dh_post,
+    dh_adviser_search,
     dh_company_search,
     dh_get_company_contact_list,
+    fetch_all_metadata,
+    invalidate_metadata_cache,
     dh_investment_create,
     dh_prepare_payload,
 )
@@ -63,8 +74,27 @@ def contact_search_response():
     }
 
 
+def adviser_search_response():
+    return {
+        "success": {
+            "results": [
+                {
+                    "id": "0919a258",
+                    "first_name": "Test",
+                    "last_name": "User",
+                    "is_active": True,
+                }
+            ]
+        },
+        "error": {"detail": "Invalid token."},
+    }
+
+
 class DataHubIntegrationTests(TestCase):
 
+    def setUp(self):
+        cache.clear()
+
     @mock.patch("app.enquiries.common.datahub_utils.fetch_metadata")
     def test_dh_request_payload(self, fetch_metadata):
         enquiry = EnquiryFactory(
@@ -125,7 +155,53 @@ class DataHubIntegrationTests(TestCase):
         assert payload == expected_dh_payload
         assert error_key is None
 
-    @mock.patch("requests.post")
+    @mock.patch("app.enquiries.common.datahub_utils.fetch_metadata")
+    def test_fetch_all_metadata_cached(self, fetch_metadata):
+        """ Test metadata is only fetched for endpoints missing from the cache """
+        fetch_metadata.side_effect = lambda name: [{"id": f"{name}-id", "name": "Name"}]
+
+        metadata = fetch_all_metadata(("sector", "fdi-type"))
+        assert metadata == {"sector": {"name": "sector-id"}, "fdi-type": {"name": "fdi-type-id"}}
+        assert fetch_metadata.call_count == 2
+
+        metadata = fetch_all_metadata(("sector", "fdi-type", "investment-type"))
+        assert metadata["investment-type"] == {"name": "investment-type-id"}
+        assert metadata["sector"] == {"name": "sector-id"}
+        assert fetch_metadata.call_count == 3
+        fetch_metadata.assert_called_with("investment-type")
+
+    @mock.patch("app.enquiries.common.datahub_utils.fetch_metadata")
+    def test_fetch_all_metadata_partial_failure(self, fetch_metadata):
+        """ Test metadata fetched before a failure is still cached """
+        def side_effect(name):
+            if name == "fdi-type":
+                raise orjson.JSONDecodeError("Invalid JSON", "", 0)
+            return [{"id": f"{name}-id", "name": "Name"}]
+
+        fetch_metadata.side_effect = side_effect
+
+        with pytest.raises(ValueError):
+            fetch_all_metadata(("sector", "fdi-type"))
+
+        fetch_metadata.side_effect = lambda name: [{"id": f"{name}-id", "name": "Name"}]
+        metadata = fetch_all_metadata(("sector", "fdi-type"))
+        assert metadata == {"sector": {"name": "sector-id"}, "fdi-type": {"name": "fdi-type-id"}}
+        assert fetch_metadata.call_count == 3
+        fetch_metadata.assert_called_with("fdi-type")
+
+    @mock.patch("app.enquiries.common.datahub_utils.fetch_metadata")
+    def test_invalidate_metadata_cache(self, fetch_metadata):
+        """ Test invalidated metadata endpoints are fetched again """
+        fetch_metadata.side_effect = lambda name: [{"id": f"{name}-id", "name": "Name"}]
+
+        fetch_all_metadata(("sector", "fdi-type"))
+        invalidate_metadata_cache(("sector",))
+        fetch_all_metadata(("sector", "fdi-type"))
+
+        assert fetch_metadata.call_count == 3
+        fetch_metadata.assert_called_with("sector")
+
+    @mock.patch("app.enquiries.common.datahub_utils._DH_SESSION.post")
     def test_dh_request_timeout(self, mock_post):
         """ Tests to ensure data hub requests raise exception """
         mock_post.side_effect = Timeout
@@ -136,7 +212,80 @@ class DataHubIntegrationTests(TestCase):
         payload = {"name": "test"}
 
         with pytest.raises(Timeout):
-            dh_request(post_req, "access_token", "POST", url, payload, timeout=2)
+            dh_post(post_req, "access_token", url, payload, timeout=2)
+
+    def test_dh_request_read_timeout_not_retried(self):
+        """ Tests a data hub request which times out waiting for a response is not retried """
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        server.listen(5)
+        url = f"http://127.0.0.1:{server.getsockname()[1]}/whoami/"
+
+        try:
+            with pytest.raises(ReadTimeout):
+                dh_get("mock_request", "access_token", url, timeout=0.2)
+            # The first connection is queued in the backlog, a retry would open another
+            server.settimeout(0.1)
+            server.accept()[0].close()
+            with pytest.raises(socket.timeout):
+                server.accept()
+        finally:
+            server.close()
+
+    @mock.patch("app.enquiries.common.datahub_utils._DH_SESSION.get")
+    def test_dh_request_circuit_open(self, mock_get):
+        """ Tests data hub requests fail fast after repeated failures """
+        mock_get.side_effect = Timeout
+        url = settings.DATA_HUB_WHOAMI_URL
+
+        for _ in range(DH_CIRCUIT_FAILURE_THRESHOLD):
+            with pytest.raises(Timeout):
+                dh_get("mock_request", "access_token", url)
+
+        with pytest.raises(DataHubCircuitOpenError):
+            dh_get("mock_request", "access_token", url)
+        assert mock_get.call_count == DH_CIRCUIT_FAILURE_THRESHOLD
+
+    @mock.patch("app.enquiries.common.datahub_utils._DH_SESSION.get")
+    def test_dh_request_circuit_open_slow_failures(self, mock_get):
+        """ Tests failures further apart in total than the reset timeout still open the circuit """
+        mock_get.side_effect = Timeout
+        url = settings.DATA_HUB_WHOAMI_URL
+
+        with freeze_time("2020-01-01 00:00:00") as frozen_time:
+            for _ in range(DH_CIRCUIT_FAILURE_THRESHOLD):
+                with pytest.raises(Timeout):
+                    dh_get("mock_request", "access_token", url)
+                frozen_time.tick(DH_CIRCUIT_RESET_TIMEOUT - 1)
+
+            with pytest.raises(DataHubCircuitOpenError):
+                dh_get("mock_request", "access_token", url)
+            assert mock_get.call_count == DH_CIRCUIT_FAILURE_THRESHOLD
+
+            frozen_time.tick(1)
+            with pytest.raises(Timeout):
+                dh_get("mock_request", "access_token", url)
+            assert mock_get.call_count == DH_CIRCUIT_FAILURE_THRESHOLD + 1
+
+    def test_dh_request_success_closes_circuit(self):
+        """ Tests a successful data hub request resets the failure count """
+        url = settings.DATA_HUB_WHOAMI_URL
+        with requests_mock.Mocker() as m:
+            m.get(url, status_code=500)
+            for _ in range(DH_CIRCUIT_FAILURE_THRESHOLD - 1):
+                dh_get("mock_request", "access_token", url)
+
+            m.get(url, json={"user": "details"})
+            dh_get("mock_request", "access_token", url)
+
+            m.get(url, status_code=500)
+            for _ in range(DH_CIRCUIT_FAILURE_THRESHOLD - 1):
+                dh_get("mock_request", "access_token", url)
+
+            # Still closed as the failures before the success no longer count
+            response = dh_get("mock_request", "access_token", url)
+            assert response.status_code == 500
+            assert m.call_count == 2 * DH_CIRCUIT_FAILURE_THRESHOLD
 
     def test_company_search_success(self):
         """ Test company search returns matches """
@@ -150,6 +299,20 @@ class DataHubIntegrationTests(TestCase):
             self.assertEqual(len(response), 1)
             self.assertEqual(response[0]["datahub_id"], expected[0]["id"])
             self.assertEqual(response[0]["name"], expected[0]["name"])
+            self.assertEqual(m.last_request.json(), {"name": "test", "limit": 10})
+
+    def test_company_search_limit(self):
+        """ Test company search passes the given limit to Data Hub """
+        with requests_mock.Mocker() as m:
+            url = settings.DATA_HUB_COMPANY_SEARCH_URL
+            m.post(url, json=company_search_response()["success"])
+
+            dh_company_search("mock_request", "access_token", "test", limit=5)
+            self.assertEqual(m.last_request.json(), {"name": "test", "limit": 5})
+
+            with override_settings(DATA_HUB_COMPANY_SEARCH_LIMIT=3):
+                dh_company_search("mock_request", "access_token", "test")
+            self.assertEqual(m.last_request.json(), {"name": "test", "limit": 3})
 
     def test_company_search_error(self):
         """ Test company search error case eg if input is blank """
@@ -178,6 +341,31 @@ class DataHubIntegrationTests(TestCase):
             self.assertEqual(response[0]["first_name"], expected[0]["first_name"])
             self.assertEqual(response[0]["last_name"], expected[0]["last_name"])
 
+    def test_adviser_search_cached(self):
+        """ Test a successful adviser search is cached by adviser name """
+        with requests_mock.Mocker() as m:
+            url = settings.DATA_HUB_ADVISER_SEARCH_URL
+            m.get(url, json=adviser_search_response()["success"])
+
+            response, error = dh_adviser_search("mock_request", "access_token", "Test User")
+            self.assertIsNone(error)
+            self.assertEqual(response[0]["datahub_id"], "0919a258")
+
+            response, error = dh_adviser_search("mock_request", "access_token", "test user")
+            self.assertIsNone(error)
+            self.assertEqual(response[0]["datahub_id"], "0919a258")
+            self.assertEqual(m.call_count, 1)
+
+    def test_adviser_search_error_not_cached(self):
+        """ Test a failed adviser search is not cached """
+        with requests_mock.Mocker() as m:
+            url = settings.DATA_HUB_ADVISER_SEARCH_URL
+            m.get(url, status_code=400, json=adviser_search_response()["error"])
+
+            dh_adviser_search("mock_request", "access_token", "Test User")
+            dh_adviser_search("mock_request", "access_token", "Test User")
+            self.assertEqual(m.call_count, 2)
+
     def test_investment_creation_fails_company_not_in_dh(self):
         """ Test that we cannot create investment if company doesn't exist in Data Hub """
         enquiry = EnquiryFactory()
@@ -213,3 +401,37 @@ class DataHubIntegrationTests(TestCase):
                 f"Enquiry can only be submitted once, previously submitted on {prev_date}, stage\
  {stage}",
             )
+
+    def test_investment_creation_checks_enquiry_first(self):
+        """ Test that an enquiry which isn't ready is rejected without requesting Data Hub """
+        enquiry = EnquiryFactory(dh_company_id="1234-2468", date_added_to_datahub=date.today())
+        req = RequestFactory()
+        post_req = req.post("/investment/", {"name": "test"})
+        post_req.session = {settings.AUTHBROKER_TOKEN_SESSION_KEY: {"access_token": "mock_token"}}
+        with requests_mock.Mocker() as m:
+            response = dh_investment_create(post_req, enquiry)
+            self.assertIn("enquiry", response["errors"][0])
+            self.assertEqual(m.call_count, 0)
+
+    def test_investment_creation_fails_user_not_in_dh(self):
+        """ Test that the user is validated in Data Hub before the adviser search result """
+        enquiry = EnquiryFactory(
+            dh_company_id="1234-2468",
+            date_added_to_datahub=None,
+            datahub_project_status=ref_data.DatahubProjectStatus.DEFAULT,
+            enquiry_stage=ref_data.EnquiryStage.NEW,
+            estimated_land_date=date.today(),
+            investment_type=ref_data.InvestmentType.ACQUISITION,
+        )
+        req = RequestFactory()
+        post_req = req.post("/investment/", {"name": "test"})
+        post_req.session = {settings.AUTHBROKER_TOKEN_SESSION_KEY: {"access_token": "mock_token"}}
+        with requests_mock.Mocker() as m:
+            m.get(settings.DATA_HUB_WHOAMI_URL, status_code=401, json={"detail": "Invalid token"})
+            m.get(settings.DATA_HUB_ADVISER_SEARCH_URL, status_code=400, json={"detail": "Bad"})
+            response = dh_investment_create(post_req, enquiry)
+            self.assertEqual(
+                response["errors"],
+                [{"referral_advisor": "Error validating your identity in DataHub"}],
+            )
+            self.assertEqual(m.call_count, 2)
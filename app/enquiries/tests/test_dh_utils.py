@@ -10,6 +10,8 @@ from app.enquiries.common.datahub_utils import (
     dh_get_matching_company_contact,
     dh_get_matching_company_contact_by_email,
     dh_prepare_contact,
+    index_metadata,
+    resolve_metadata_id,
 )
 
 faker = Faker()
@@ -157,6 +159,18 @@ class DataHubUtilsTests(TestCase):
         )
         self.assertIsNone(contact)
 
+    def test_resolve_metadata_id(self):
+        """Test metadata ids are resolved case insensitively from the metadata index"""
+        metadata = index_metadata([
+            {"id": "1", "name": "Aerospace"},
+            {"id": "2", "name": "Automotive"},
+            {"id": "3", "name": "aerospace"},
+        ])
+
+        self.assertEqual(resolve_metadata_id("AEROSPACE", metadata), "1")
+        self.assertEqual(resolve_metadata_id("Automotive", metadata), "2")
+        self.assertIsNone(resolve_metadata_id("Mining", metadata))
+
     @mock.patch('app.enquiries.common.datahub_utils.dh_contact_create')
     @mock.patch('app.enquiries.common.datahub_utils.dh_get_matching_company_contact')
     @mock.patch('app.enquiries.common.datahub_utils.dh_get_company_contact_list')
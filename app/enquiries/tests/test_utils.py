@@ -8,6 +8,7 @@ from freezegun import freeze_time
 import app.enquiries.tests.utils as test_utils
 from app.enquiries import models, utils
 from app.enquiries.tests.factories import (
+    EnquiryFactory,
     create_fake_enquiry_csv_row,
     create_fake_enquiry_csv_row_no_date_received
 )
@@ -72,6 +73,29 @@ class UtilsTestCase(test_utils.BaseEnquiryTestCase):
         self.login()
 
 
+@pytest.mark.django_db
+def test_iterate_in_chunks():
+    EnquiryFactory.create_batch(5)
+    queryset = models.Enquiry.objects.order_by("id")
+
+    assert list(utils.iterate_in_chunks(queryset, 2)) == list(queryset)
+
+
+@pytest.mark.django_db
+def test_iterate_in_chunks_with_concurrent_insert():
+    enquiries = EnquiryFactory.create_batch(5)
+    queryset = models.Enquiry.objects.order_by("-id")
+
+    iterated = []
+    for enquiry in utils.iterate_in_chunks(queryset, 2):
+        if not iterated:
+            # sorts first so would shift every subsequent chunk by one row
+            EnquiryFactory()
+        iterated.append(enquiry)
+
+    assert iterated == enquiries[::-1]
+
+
 @pytest.mark.parametrize("params", [
     (None, None),
     (True, True),
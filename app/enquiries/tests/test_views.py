@@ -9,7 +9,9 @@ import pytest
 from bs4 import BeautifulSoup
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.forms.models import model_to_dict
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from faker import Faker
 from openpyxl import load_workbook
@@ -226,6 +228,17 @@ class EnquiryViewTestCase(test_utils.BaseEnquiryTestCase):
             msg="document should have type: application/json",
         )
 
+    def test_enquiry_list_html_query_count(self):
+        """Test the number of queries doesn't grow with the number of listed enquiries"""
+        EnquiryFactory.create_batch(2)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("index"), **headers)
+        num_queries = len(queries)
+
+        EnquiryFactory.create_batch(5)
+        with self.assertNumQueries(num_queries):
+            self.client.get(reverse("index"), **headers)
+
     def test_enquiry_list_content_type_html(self):
         headers = {
             "HTTP_CONTENT_TYPE": "text/html",
@@ -607,9 +620,20 @@ class EnquiryViewTestCase(test_utils.BaseEnquiryTestCase):
         Asserts that response to a ``format=csv`` request returns the expected enquiry fields.
         """
         response = self.client.get(reverse("index"), dict(format="csv"))
-        assert response.content.decode().strip() == ",".join(
-            settings.EXPORT_OUTPUT_FILE_CSV_HEADERS
-        )
+        content = b"".join(response.streaming_content).decode()
+        assert content.strip() == ",".join(settings.EXPORT_OUTPUT_FILE_CSV_HEADERS)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_enquiry_csv_response_rows(self):
+        """
+        Asserts that a ``format=csv`` request streams a row for every enquiry
+        across several chunks.
+        """
+        enquiries = EnquiryFactory.create_batch(5)
+        response = self.client.get(reverse("index"), dict(format="csv", sortby="company_name"))
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+        rows = list(csv.DictReader(b"".join(response.streaming_content).decode().splitlines()))
+        assert [row["company_name"] for row in rows] == sorted(e.company_name for e in enquiries)
 
     @pytest.mark.skip(
         reason="@TODO need to investigate why the Owner model cannot be serialized"
@@ -937,3 +961,27 @@ class TestAPIEnquiries:
         assert data["next"] is not None
         assert data["previous"] is not None
         assert len(data["results"]) == 5
+
+    def test_enquiries_list_query_count(self, api_client, settings, django_assert_num_queries):
+        """The number of queries shouldn't grow with the number of listed enquiries"""
+        settings.HAWK_CREDENTIALS = {
+            "test": {
+                "key": "test-key",
+                "scopes": ("enquiries",),
+            },
+        }
+        url = f"http://testserver{reverse('api-v1-enquiries')}"
+
+        EnquiryFactory.create_batch(2)
+        sender = _auth_sender("test", "test-key", url, "GET")
+        with CaptureQueriesContext(connection) as queries:
+            api_client.get(url, content_type="", HTTP_AUTHORIZATION=sender.request_header)
+        num_queries = len(queries)
+
+        EnquiryFactory.create_batch(5)
+        sender = _auth_sender("test", "test-key", url, "GET")
+        with django_assert_num_queries(num_queries):
+            response = api_client.get(
+                url, content_type="", HTTP_AUTHORIZATION=sender.request_header
+            )
+        assert len(response.json()["results"]) == 7
@@ -167,6 +167,31 @@ def parse_error_messages(e):
     return response
 
 
+def iterate_in_chunks(queryset, chunk_size):
+    """
+    Iterates over ``queryset`` evaluating at most ``chunk_size`` rows at a time.
+
+    The primary keys are read in order with a single query before any rows are
+    loaded, so rows created, deleted or reordered while iterating don't cause
+    duplicates or gaps. Each chunk is then fetched by primary key which, unlike
+    :meth:`django.db.models.query.QuerySet.iterator`, honours
+    ``prefetch_related()`` lookups. Rows deleted in the meantime are skipped.
+
+    :param queryset:
+    :type queryset: django.db.models.query.QuerySet
+
+    :param chunk_size: Maximum number of rows fetched per query
+    :type chunk_size: int
+
+    :returns: A generator of model instances
+    """
+    pks = list(queryset.values_list("pk", flat=True))
+    for start in range(0, len(pks), chunk_size):
+        chunk = pks[start:start + chunk_size]
+        instances = queryset.in_bulk(chunk)
+        yield from (instances[pk] for pk in chunk if pk in instances)
+
+
 def mark_non_responsive_enquiries(expiry_weeks):
     past_date = datetime.now(timezone.utc) - timedelta(weeks=expiry_weeks)
     logging.info(f"Updating non-responsive enquiries from before {past_date}")
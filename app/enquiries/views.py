@@ -4,6 +4,7 @@ import logging
 from datetime import datetime
 from io import BytesIO
 
+import orjson
 from chardet import UniversalDetector
 from django.conf import settings
 from django.contrib import messages
@@ -11,7 +12,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.db.models import Q
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.views import View
@@ -27,14 +28,14 @@ from rest_framework.renderers import TemplateHTMLRenderer
 from rest_framework.response import Response
 from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
-from rest_framework_csv.renderers import CSVRenderer
+from rest_framework_csv.renderers import CSVStreamingRenderer
 
 from app.enquiries import auth, forms, models, serializers, utils
 from app.enquiries.common import consent, consent_utils
 from app.enquiries.common.datahub_utils import (
     dh_investment_create,
     dh_company_search,
-    dh_request,
+    dh_get,
 )
 from app.enquiries.utils import (
     row_to_enquiry,
@@ -55,16 +56,15 @@ class DataHubAdviserSearch(LoginRequiredMixin, View):
         session = get_oauth_payload(request)
         access_token = session["access_token"]
 
-        res = dh_request(
+        res = dh_get(
             request,
             access_token,
-            method="GET",
             url=settings.DATA_HUB_ADVISER_SEARCH_URL,
             params=dict(autocomplete=request.GET.get("q")),
         )
 
         try:
-            data = res.json()
+            data = orjson.loads(res.content)
         except json.decoder.JSONDecodeError:
             data = {}
 
@@ -292,7 +292,7 @@ class EnquiryFilter(filters.FilterSet):
         }
 
 
-class EnquiryListCSVRenderer(CSVRenderer):
+class EnquiryListCSVRenderer(CSVStreamingRenderer):
     """
     A custom CSV renderer showing only selected fields.
     """
@@ -311,7 +311,9 @@ class APIEnquiries(auth.HawkResponseSigningMixin, ListAPIView):
     pagination_class = Pagination
     required_hawk_scope = auth.HawkScope.enquiries
     filter_backends = (OrderingFilter,)
-    queryset = models.Enquiry.objects.all()
+    queryset = models.Enquiry.objects.select_related("enquirer", "owner").prefetch_related(
+        "owner__groups", "owner__user_permissions",
+    )
 
 
 class EnquiryListView(LoginRequiredMixin, ListAPIView):
@@ -328,10 +330,18 @@ class EnquiryListView(LoginRequiredMixin, ListAPIView):
 
     def get_queryset(self):
         sortby = self.request.query_params.get("sortby")
-        all_enquiries = models.Enquiry.objects.all()
+        # The serializer nests the enquirer and owner (including the owner's
+        # groups and permissions), fetch them up front to avoid queries per row
+        all_enquiries = models.Enquiry.objects.select_related(
+            "enquirer", "owner",
+        ).prefetch_related(
+            "owner__groups", "owner__user_permissions",
+        )
 
+        # Tie-break on the primary key so that pagination is deterministic
         return all_enquiries.order_by(
-            sortby if sortby in settings.ENQUIRY_SORT_OPTIONS.keys() else "-date_received"
+            sortby if sortby in settings.ENQUIRY_SORT_OPTIONS.keys() else "-date_received",
+            "id",
         )
 
     @property
@@ -346,6 +356,23 @@ class EnquiryListView(LoginRequiredMixin, ListAPIView):
 
         return super().paginator
 
+    def list(self, request, *args, **kwargs):
+        """Streams ``?format=csv`` exports row by row instead of loading all enquiries at once"""
+        if not self.is_csv:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        rows = (
+            serializer.to_representation(enquiry)
+            for enquiry in utils.iterate_in_chunks(queryset, settings.EXPORT_CHUNK_SIZE)
+        )
+        renderer = request.accepted_renderer
+        return StreamingHttpResponse(
+            renderer.render(rows, renderer_context=self.get_renderer_context()),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+
     def finalize_response(self, *args, **kwargs):
         """Handles the ``Content-Disposition`` header of a ``?format=csv`` request"""
         response = super().finalize_response(*args, **kwargs)
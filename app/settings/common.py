@@ -235,6 +235,7 @@ IMPORT_ENQUIRIES_MIME_TYPES = ["text/csv", "application/vnd.ms-excel"]
 IMPORT_TEMPLATE_FILENAME = 'rtt_enquiries_import_template.xlsx'
 IMPORT_TEMPLATE_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 UPLOAD_CHUNK_SIZE = 256000
+EXPORT_CHUNK_SIZE = 500
 EXPORT_OUTPUT_FILE_SLUG = 'rtt_enquiries_export'
 EXPORT_OUTPUT_FILE_EXT = 'csv'
 EXPORT_OUTPUT_FILE_MIMETYPE = 'text/csv'
@@ -260,6 +261,9 @@ DATA_HUB_INVESTMENT_CREATE_URL = env('DATA_HUB_INVESTMENT_CREATE_URL')
 DATA_HUB_WHOAMI_URL = env('DATA_HUB_WHOAMI_URL')
 DATA_HUB_FRONTEND = env('DATA_HUB_FRONTEND')
 DATA_HUB_CREATE_COMPANY_PAGE_URL = env('DATA_HUB_CREATE_COMPANY_PAGE_URL')
+# Maximum number of companies returned by a Data Hub company search, the
+# default matches Data Hub's own page size which is what the search page shows
+DATA_HUB_COMPANY_SEARCH_LIMIT = env.int('DATA_HUB_COMPANY_SEARCH_LIMIT', default=10)
 
 DATA_HUB_HAWK_ID = env("DATA_HUB_HAWK_ID")
 DATA_HUB_HAWK_KEY = env("DATA_HUB_HAWK_KEY")